@@ -1,15 +1,22 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 import base64
+import hashlib
+import tempfile
+import html
 from io import BytesIO
 from PIL import Image
 import math
+import mimetypes
 import json
+from contextlib import contextmanager
 import re
-from typing import Optional, Dict, List, Union
+from typing import Callable, Optional, Dict, List, Tuple, Union
 
 # ===== PAGE CONFIG - MUST BE FIRST STREAMLIT COMMAND =====
 st.set_page_config(
@@ -53,23 +60,56 @@ if 'my_transport_listings' not in st.session_state:
 os.makedirs('data', exist_ok=True)
 os.makedirs('images/uploads', exist_ok=True)
 
+DB_PATH = 'agrimarket.db'
+
+# WAL lets listing pages read while a sell form commits; NORMAL sync is safe under WAL
+SQLITE_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+PRAGMA mmap_size=268435456;
+"""
+
+# Indexes let the ORDER BY date DESC list queries walk the index instead of sorting
+LISTING_INDEXES = {
+    'crop_listings': {
+        'idx_crop_date': "CREATE INDEX IF NOT EXISTS idx_crop_date ON crop_listings(date DESC)",
+    },
+    'pesticide_listings': {
+        'idx_pesticide_date': "CREATE INDEX IF NOT EXISTS idx_pesticide_date ON pesticide_listings(date DESC)",
+    },
+    'transport_listings': {
+        'idx_transport_date': "CREATE INDEX IF NOT EXISTS idx_transport_date ON transport_listings(date DESC)",
+        'idx_transport_avail_date': "CREATE INDEX IF NOT EXISTS idx_transport_avail_date ON transport_listings(is_available, date DESC)",
+    },
+}
+
 # Database connection with connection pooling
 class Database:
-    _instance = None
+    def initialize(self):
+        self._local = threading.local()
+        
+        # Schema setup runs once on a dedicated bootstrap connection
+        bootstrap = self._connect()
+        try:
+            self.initialize_tables(bootstrap)
+        finally:
+            bootstrap.close()
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(Database, cls).__new__(cls)
-            cls._instance.initialize()
-        return cls._instance
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SQLITE_PRAGMAS)
+        return conn
     
-    def initialize(self):
-        self.conn = sqlite3.connect('agrimarket.db', check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self.initialize_tables()
+    def initialize_tables(self, conn: sqlite3.Connection):
+        with conn:
+            self._create_schema(conn.cursor())
     
-    def initialize_tables(self):
-        cursor = self.conn.cursor()
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        # All DDL runs in one transaction; indexes are built after the tables exist
+        cursor.execute("BEGIN")
         
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS crop_listings (
@@ -81,6 +121,7 @@ class Database:
             contact TEXT NOT NULL,
             location TEXT NOT NULL,
             image_path TEXT,
+            thumb_path TEXT,
             date TEXT NOT NULL,
             CHECK (quantity > 0),
             CHECK (price > 0)
@@ -98,6 +139,7 @@ class Database:
             contact TEXT NOT NULL,
             location TEXT NOT NULL,
             image_path TEXT,
+            thumb_path TEXT,
             date TEXT NOT NULL,
             CHECK (quantity > 0),
             CHECK (price > 0)
@@ -119,29 +161,84 @@ class Database:
             description TEXT,
             is_available INTEGER NOT NULL DEFAULT 1,
             image_path TEXT,
+            thumb_path TEXT,
             date TEXT NOT NULL,
             CHECK (capacity > 0),
             CHECK (rate_per_km > 0)
         )
         ''')
         
-        self.conn.commit()
+        # Databases created before thumbnails were stored need the new column
+        for table in ('crop_listings', 'pesticide_listings', 'transport_listings'):
+            columns = [row['name'] for row in cursor.execute(f"PRAGMA table_info({table})")]
+            if 'thumb_path' not in columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN thumb_path TEXT")
+        
+        for indexes in LISTING_INDEXES.values():
+            for create_sql in indexes.values():
+                cursor.execute(create_sql)
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
     
-    def get_connection(self):
-        return self.conn
+    @contextmanager
+    def transaction(self, changes_listings: bool = False):
+        """Run the enclosed statements as one write transaction on this thread's connection"""
+        conn = self.get_connection()
+        if conn.in_transaction:
+            # Nested use joins the outer transaction, which commits once at the end
+            if changes_listings:
+                self._local.listings_changed = True
+            yield conn
+            return
+        
+        self._local.listings_changed = changes_listings
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            # Invalidate cached listings only once the outermost transaction has ended,
+            # including after a rollback in case a read inside it cached uncommitted rows
+            if self._local.listings_changed:
+                self._local.listings_changed = False
+                bump_listings_version()
     
     def close(self):
-        if hasattr(self, 'conn'):
-            self.conn.close()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            del self._local.conn
+
+@st.cache_resource
+def get_db() -> Database:
+    """Create and initialize the shared Database once per server process"""
+    database = Database()
+    database.initialize()
+    return database
 
 # Initialize database singleton
-db = Database()
+db = get_db()
 
 # Utility functions
+_PHONE_RE = re.compile(r'^(\+91[\-\s]?)?[0]?(91)?[6789]\d{9}$')
+
 def validate_phone_number(phone: str) -> bool:
     """Validate Indian phone numbers"""
-    pattern = re.compile(r'^(\+91[\-\s]?)?[0]?(91)?[6789]\d{9}$')
-    return bool(pattern.match(phone))
+    # Cheap digit-count check rejects partial or malformed input before the regex runs;
+    # any match has 10-15 digits, the last ten starting with 6-9
+    digits = ''.join(c for c in phone if c.isdigit())
+    if not 10 <= len(digits) <= 15 or digits[-10] not in '6789':
+        return False
+    return _PHONE_RE.match(phone) is not None
 
 def validate_input(text: str, field_name: str, min_length: int = 2) -> bool:
     """Validate text input"""
@@ -150,41 +247,80 @@ def validate_input(text: str, field_name: str, min_length: int = 2) -> bool:
         return False
     return True
 
-def save_uploaded_image(uploaded_file) -> Optional[str]:
-    """Save uploaded image and return the file path"""
+def _save_jpeg_atomic(img: Image.Image, filepath: str):
+    """Write a JPEG to a sibling temp file and rename it into place"""
+    # A unique temp name per write, so concurrent uploads of the same image don't share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            img.save(tmp_file, format='JPEG', quality=85, optimize=False, progressive=False)
+        # mkstemp creates owner-only files; uploads must stay readable like before
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def save_uploaded_image(uploaded_file) -> Tuple[Optional[str], Optional[str]]:
+    """Save uploaded image and a listing-card thumbnail, returning both file paths"""
     if uploaded_file is None:
-        return None
+        return None, None
     
     try:
         # Validate file type
         file_extension = os.path.splitext(uploaded_file.name)[1].lower()
         if file_extension not in ['.jpg', '.jpeg', '.png']:
             st.error("Only JPG/JPEG/PNG images are allowed")
-            return None
+            return None, None
+        
+        # Name files by content hash so re-uploads of the same image are reused;
+        # everything is stored as RGB JPEG
+        data = uploaded_file.getvalue()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        filepath = os.path.join("images/uploads", f"{digest}.jpg")
+        thumb_filepath = os.path.join("images/uploads", f"{digest}_thumb.jpg")
         
-        # Create unique filename
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"product_{timestamp}{file_extension}"
-        filepath = os.path.join("images/uploads", filename)
+        if os.path.exists(filepath) and os.path.exists(thumb_filepath):
+            return filepath, thumb_filepath
         
         # Process and save image
-        img = Image.open(uploaded_file)
+        img = Image.open(BytesIO(data))
         
-        # Resize if too large
-        if img.size[0] > 1024 or img.size[1] > 1024:
-            img.thumbnail((1024, 1024))
+        # Let libjpeg decode at a reduced 1/2, 1/4 or 1/8 scale instead of full size
+        if img.format == 'JPEG':
+            img.draft('RGB', (1024, 1024))
         
-        # Convert to RGB if needed
+        # Convert to RGB if needed (reduce() does not support palette images)
         if img.mode != 'RGB':
             img = img.convert('RGB')
         
-        img.save(filepath, quality=85)
-        return filepath
+        # Resize if too large: a cheap integer box reduce first, then an exact LANCZOS pass
+        if img.size[0] > 1024 or img.size[1] > 1024:
+            factor = max(1, min(img.size[0] // 1024, img.size[1] // 1024))
+            if factor > 1:
+                img = img.reduce(factor)
+            img.thumbnail((1024, 1024), Image.LANCZOS)
+        
+        _save_jpeg_atomic(img, filepath)
+        
+        # Listing cards are 200px wide, so they only need a small thumbnail
+        thumb = img.copy()
+        thumb.thumbnail((256, 256))
+        _save_jpeg_atomic(thumb, thumb_filepath)
+        return filepath, thumb_filepath
     
     except Exception as e:
         st.error(f"Failed to save image: {str(e)}")
-        return None
+        return None, None
+
+def list_uploaded_images() -> set:
+    """Get the names of all uploaded image files with a single directory listing"""
+    try:
+        return set(os.listdir("images/uploads"))
+    except OSError:
+        return set()
 
+@st.cache_data(max_entries=256, show_spinner=False)
 def get_image_as_base64(path: str) -> Optional[str]:
     """Convert an image to base64 for embedded display"""
     if not path or not os.path.exists(path):
@@ -198,6 +334,161 @@ def get_image_as_base64(path: str) -> Optional[str]:
         return None
 
 # Database operations
+DB_ERRORS = (sqlite3.Error, pd.errors.DatabaseError)  # pandas wraps sqlite errors from read_sql_query
+
+CROP_COLUMNS = ('crop_name', 'quantity', 'price', 'seller_name', 'contact', 'location', 'image_path', 'thumb_path', 'date')
+PESTICIDE_COLUMNS = ('pesticide_name', 'quantity', 'unit', 'price', 'seller_name', 'contact', 'location', 'image_path', 'thumb_path', 'date')
+# Compact dtypes for the transport frame; the filtered text columns become categoricals.
+# Capacity and rate stay float64 so the displayed values don't pick up float32 rounding
+TRANSPORT_DTYPES = {
+    'id': 'int32',
+    'vehicle_type': 'category',
+    'available_from': 'category',
+}
+TRANSPORT_COLUMNS = ('vehicle_type', 'capacity', 'capacity_unit', 'rate_per_km', 'available_from', 'available_to',
+                     'available_date', 'provider_name', 'contact', 'description', 'is_available', 'image_path', 'thumb_path', 'date')
+
+# Writes from this process bump the listings version; the TTL bounds how long
+# rows written by another process sharing agrimarket.db can stay hidden
+LISTINGS_CACHE_TTL = 60
+
+@st.cache_resource
+def _listings_state() -> Dict:
+    """Process-wide listings version shared by all sessions"""
+    return {'version': 0, 'lock': threading.Lock()}
+
+def listings_version() -> int:
+    """Current listings version, changed by every write"""
+    return _listings_state()['version']
+
+def bump_listings_version():
+    """Invalidate cached listing queries after a write"""
+    state = _listings_state()
+    # Session threads can commit at the same time; don't lose a bump
+    with state['lock']:
+        state['version'] += 1
+
+@st.cache_data(ttl=LISTINGS_CACHE_TTL, show_spinner=False)
+def _cached_query(sql: str, params: tuple, version: int) -> List[Dict]:
+    """Run a listings SELECT, reusing the result until the listings version changes"""
+    # Plain tuples skip building a sqlite3.Row per row; Rows can't be pickled by cache_data anyway
+    cursor = db.get_connection().cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def _query_listings(sql: str, params: tuple = ()) -> List[Dict]:
+    """Run a cached listings SELECT for the current listings version"""
+    return _cached_query(sql, params, listings_version())
+
+@st.cache_data(ttl=LISTINGS_CACHE_TTL, show_spinner=False)
+def _cached_frame(sql: str, params: tuple, version: int,
+                  _prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> pd.DataFrame:
+    """Run a listings SELECT into a DataFrame, reusing it until the listings version changes"""
+    # _prepare is not hashed by Streamlit; each getter's SQL already keys its own entries
+    # Plain tuples here too; read_sql_query would build a sqlite3.Row per row and then unpack it
+    cursor = db.get_connection().cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    frame = pd.DataFrame.from_records(cursor.fetchall(), columns=[description[0] for description in cursor.description],
+                                      coerce_float=True)
+    # NULL TEXT can come back as NaN, which is truthy; hand renderers None instead
+    text_columns = [column for column in frame.columns if not pd.api.types.is_numeric_dtype(frame[column])]
+    frame[text_columns] = frame[text_columns].astype(object).where(frame[text_columns].notna(), None)
+    if _prepare is not None:
+        frame = _prepare(frame)
+    return frame
+
+def _add_image_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """Resolve each listing's card image and whether it exists on disk, once at load time"""
+    uploaded_images = list_uploaded_images()
+    card_images = frame['thumb_path'].where(frame['thumb_path'].notna(), frame['image_path'])
+    frame['card_image'] = card_images
+    frame['has_image'] = [isinstance(path, str) and os.path.basename(path) in uploaded_images
+                          for path in card_images]
+    return frame
+
+def _prepare_transport_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Add image columns, compact dtypes and the sample trip cost to a transport frame"""
+    frame = _add_image_columns(frame).astype(TRANSPORT_DTYPES)
+    # Example trip cost shown on every transport card, computed once per load
+    frame['sample_cost_50km'] = frame['rate_per_km'] * 50
+    return frame
+
+def _query_frame(sql: str, params: tuple = (),
+                 prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> pd.DataFrame:
+    """Run a cached listings SELECT into a DataFrame for the current listings version"""
+    return _cached_frame(sql, params, listings_version(), prepare)
+
+def _bulk_insert(table: str, columns: tuple, rows: List[tuple], defer_indexes: bool = False) -> int:
+    """Insert many rows into a table with one executemany and a single commit"""
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    # Deferred indexes are dropped before the load and rebuilt once after it
+    indexes = LISTING_INDEXES.get(table, {}) if defer_indexes else {}
+    with db.transaction(changes_listings=True) as conn:
+        for index_name in indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        conn.executemany(sql, rows)
+        for create_sql in indexes.values():
+            conn.execute(create_sql)
+    return len(rows)
+
+def _crop_row(listing_data: Dict) -> tuple:
+    """Convert a crop listing dict into an INSERT parameter tuple"""
+    return (
+        listing_data['crop_name'],
+        float(listing_data['quantity']),
+        float(listing_data['price']),
+        listing_data['seller_name'],
+        listing_data['contact'],
+        listing_data['location'],
+        listing_data.get('image_path'),
+        listing_data.get('thumb_path'),
+        listing_data['date']
+    )
+
+def _pesticide_row(listing_data: Dict) -> tuple:
+    """Convert a pesticide listing dict into an INSERT parameter tuple"""
+    return (
+        listing_data['pesticide_name'],
+        float(listing_data['quantity']),
+        listing_data['unit'],
+        float(listing_data['price']),
+        listing_data['seller_name'],
+        listing_data['contact'],
+        listing_data['location'],
+        listing_data.get('image_path'),
+        listing_data.get('thumb_path'),
+        listing_data['date']
+    )
+
+def _transport_row(listing_data: Dict) -> tuple:
+    """Convert a transport listing dict into an INSERT parameter tuple"""
+    available_date = None
+    if 'available_date' in listing_data and listing_data['available_date']:
+        if isinstance(listing_data['available_date'], str):
+            available_date = listing_data['available_date']
+        else:
+            available_date = listing_data['available_date'].strftime("%Y-%m-%d")
+    
+    return (
+        listing_data['vehicle_type'],
+        float(listing_data['capacity']),
+        listing_data['capacity_unit'],
+        float(listing_data['rate_per_km']),
+        listing_data['available_from'],
+        listing_data.get('available_to'),
+        available_date,
+        listing_data['provider_name'],
+        listing_data['contact'],
+        listing_data.get('description'),
+        1,  # is_available = True
+        listing_data.get('image_path'),
+        listing_data.get('thumb_path'),
+        listing_data['date']
+    )
+
 def save_crop_listing(listing_data: Dict) -> bool:
     """Save a crop listing to the database"""
     if not all(key in listing_data for key in ['crop_name', 'quantity', 'price', 'seller_name', 'contact', 'location', 'date']):
@@ -205,25 +496,7 @@ def save_crop_listing(listing_data: Dict) -> bool:
         return False
     
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT INTO crop_listings 
-        (crop_name, quantity, price, seller_name, contact, location, image_path, date)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            listing_data['crop_name'],
-            float(listing_data['quantity']),
-            float(listing_data['price']),
-            listing_data['seller_name'],
-            listing_data['contact'],
-            listing_data['location'],
-            listing_data.get('image_path'),
-            listing_data['date']
-        ))
-        
-        conn.commit()
+        _bulk_insert('crop_listings', CROP_COLUMNS, [_crop_row(listing_data)])
         return True
     except sqlite3.Error as e:
         st.error(f"Database error saving crop listing: {e}")
@@ -232,6 +505,28 @@ def save_crop_listing(listing_data: Dict) -> bool:
         st.error(f"Invalid number format: {e}")
         return False
 
+def bulk_save_crop_listings(rows: List[Dict], defer_indexes: bool = False) -> bool:
+    """Save many crop listings to the database in a single transaction"""
+    required_fields = ['crop_name', 'quantity', 'price', 'seller_name', 'contact', 'location', 'date']
+    
+    if not all(key in row for row in rows for key in required_fields):
+        st.error("Missing required fields in crop listing data")
+        return False
+    
+    try:
+        _bulk_insert('crop_listings', CROP_COLUMNS, [_crop_row(row) for row in rows], defer_indexes)
+        return True
+    except sqlite3.Error as e:
+        st.error(f"Database error saving crop listings: {e}")
+        return False
+    except ValueError as e:
+        st.error(f"Invalid number format: {e}")
+        return False
+
+def bulk_import_crop_listings(rows: List[Dict]) -> bool:
+    """Seed-load crop listings, rebuilding the date index once after the insert"""
+    return bulk_save_crop_listings(rows, defer_indexes=True)
+
 def save_pesticide_listing(listing_data: Dict) -> bool:
     """Save a pesticide listing to the database"""
     if not all(key in listing_data for key in ['pesticide_name', 'quantity', 'unit', 'price', 'seller_name', 'contact', 'location', 'date']):
@@ -239,26 +534,7 @@ def save_pesticide_listing(listing_data: Dict) -> bool:
         return False
     
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT INTO pesticide_listings 
-        (pesticide_name, quantity, unit, price, seller_name, contact, location, image_path, date)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            listing_data['pesticide_name'],
-            float(listing_data['quantity']),
-            listing_data['unit'],
-            float(listing_data['price']),
-            listing_data['seller_name'],
-            listing_data['contact'],
-            listing_data['location'],
-            listing_data.get('image_path'),
-            listing_data['date']
-        ))
-        
-        conn.commit()
+        _bulk_insert('pesticide_listings', PESTICIDE_COLUMNS, [_pesticide_row(listing_data)])
         return True
     except sqlite3.Error as e:
         st.error(f"Database error saving pesticide listing: {e}")
@@ -267,35 +543,59 @@ def save_pesticide_listing(listing_data: Dict) -> bool:
         st.error(f"Invalid number format: {e}")
         return False
 
-def get_all_crop_listings() -> List[Dict]:
+def get_all_crop_listings() -> pd.DataFrame:
     """Get all crop listings from the database"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM crop_listings ORDER BY date DESC")
-        return [dict(row) for row in cursor.fetchall()]
-    except sqlite3.Error as e:
+        return _query_frame("SELECT * FROM crop_listings ORDER BY date DESC", prepare=_add_image_columns)
+    except DB_ERRORS as e:
         st.error(f"Database error getting crop listings: {e}")
-        return []
+        return pd.DataFrame()
 
-def get_all_pesticide_listings() -> List[Dict]:
-    """Get all pesticide listings from the database"""
+def get_recent_crop_listings(limit: int = 5) -> pd.DataFrame:
+    """Get the most recent crop listings from the database"""
+    try:
+        return _query_frame("SELECT * FROM crop_listings ORDER BY date DESC LIMIT ?", (limit,), prepare=_add_image_columns)
+    except DB_ERRORS as e:
+        st.error(f"Database error getting recent crop listings: {e}")
+        return pd.DataFrame()
+
+def has_crop_listings() -> bool:
+    """Check whether any crop listings exist without fetching them"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM pesticide_listings ORDER BY date DESC")
-        return [dict(row) for row in cursor.fetchall()]
+        return bool(_query_listings("SELECT 1 FROM crop_listings LIMIT 1"))
     except sqlite3.Error as e:
+        st.error(f"Database error checking crop listings: {e}")
+        return False
+
+def get_all_pesticide_listings() -> pd.DataFrame:
+    """Get all pesticide listings from the database"""
+    try:
+        return _query_frame("SELECT * FROM pesticide_listings ORDER BY date DESC", prepare=_add_image_columns)
+    except DB_ERRORS as e:
         st.error(f"Database error getting pesticide listings: {e}")
-        return []
+        return pd.DataFrame()
+
+def get_recent_pesticide_listings(limit: int = 5) -> pd.DataFrame:
+    """Get the most recent pesticide listings from the database"""
+    try:
+        return _query_frame("SELECT * FROM pesticide_listings ORDER BY date DESC LIMIT ?", (limit,), prepare=_add_image_columns)
+    except DB_ERRORS as e:
+        st.error(f"Database error getting recent pesticide listings: {e}")
+        return pd.DataFrame()
+
+def has_pesticide_listings() -> bool:
+    """Check whether any pesticide listings exist without fetching them"""
+    try:
+        return bool(_query_listings("SELECT 1 FROM pesticide_listings LIMIT 1"))
+    except sqlite3.Error as e:
+        st.error(f"Database error checking pesticide listings: {e}")
+        return False
 
 def delete_crop_listing(listing_id: int) -> bool:
     """Delete a crop listing from the database"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM crop_listings WHERE id = ?", (listing_id,))
-        conn.commit()
+        with db.transaction(changes_listings=True) as conn:
+            cursor = conn.execute("DELETE FROM crop_listings WHERE id = ?", (listing_id,))
         return cursor.rowcount > 0
     except sqlite3.Error as e:
         st.error(f"Database error deleting crop listing: {e}")
@@ -304,10 +604,8 @@ def delete_crop_listing(listing_id: int) -> bool:
 def delete_pesticide_listing(listing_id: int) -> bool:
     """Delete a pesticide listing from the database"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM pesticide_listings WHERE id = ?", (listing_id,))
-        conn.commit()
+        with db.transaction(changes_listings=True) as conn:
+            cursor = conn.execute("DELETE FROM pesticide_listings WHERE id = ?", (listing_id,))
         return cursor.rowcount > 0
     except sqlite3.Error as e:
         st.error(f"Database error deleting pesticide listing: {e}")
@@ -323,38 +621,7 @@ def save_transport_listing(listing_data: Dict) -> bool:
         return False
     
     try:
-        available_date = None
-        if 'available_date' in listing_data and listing_data['available_date']:
-            if isinstance(listing_data['available_date'], str):
-                available_date = listing_data['available_date']
-            else:
-                available_date = listing_data['available_date'].strftime("%Y-%m-%d")
-        
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT INTO transport_listings 
-        (vehicle_type, capacity, capacity_unit, rate_per_km, available_from, available_to,
-         available_date, provider_name, contact, description, is_available, image_path, date)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            listing_data['vehicle_type'],
-            float(listing_data['capacity']),
-            listing_data['capacity_unit'],
-            float(listing_data['rate_per_km']),
-            listing_data['available_from'],
-            listing_data.get('available_to'),
-            available_date,
-            listing_data['provider_name'],
-            listing_data['contact'],
-            listing_data.get('description'),
-            1,  # is_available = True
-            listing_data.get('image_path'),
-            listing_data['date']
-        ))
-        
-        conn.commit()
+        _bulk_insert('transport_listings', TRANSPORT_COLUMNS, [_transport_row(listing_data)])
         return True
     except sqlite3.Error as e:
         st.error(f"Database error saving transport listing: {e}")
@@ -363,38 +630,30 @@ def save_transport_listing(listing_data: Dict) -> bool:
         st.error(f"Invalid number format: {e}")
         return False
 
-def get_all_transport_listings() -> List[Dict]:
+def get_all_transport_listings() -> pd.DataFrame:
     """Get all transport listings from the database"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM transport_listings ORDER BY date DESC")
-        return [dict(row) for row in cursor.fetchall()]
-    except sqlite3.Error as e:
+        return _query_frame("SELECT * FROM transport_listings ORDER BY date DESC", prepare=_prepare_transport_frame)
+    except DB_ERRORS as e:
         st.error(f"Database error getting transport listings: {e}")
-        return []
+        return pd.DataFrame()
 
-def get_available_transport_listings() -> List[Dict]:
+def get_available_transport_listings() -> pd.DataFrame:
     """Get only available transport listings from the database"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM transport_listings WHERE is_available = 1 ORDER BY date DESC")
-        return [dict(row) for row in cursor.fetchall()]
-    except sqlite3.Error as e:
+        return _query_frame("SELECT * FROM transport_listings WHERE is_available = 1 ORDER BY date DESC", prepare=_prepare_transport_frame)
+    except DB_ERRORS as e:
         st.error(f"Database error getting available transport listings: {e}")
-        return []
+        return pd.DataFrame()
 
 def update_transport_availability(listing_id: int, is_available: bool) -> bool:
     """Update the availability status of a transport listing"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE transport_listings SET is_available = ? WHERE id = ?",
-            (1 if is_available else 0, listing_id)
-        )
-        conn.commit()
+        with db.transaction(changes_listings=True) as conn:
+            cursor = conn.execute(
+                "UPDATE transport_listings SET is_available = ? WHERE id = ?",
+                (1 if is_available else 0, listing_id)
+            )
         return cursor.rowcount > 0
     except sqlite3.Error as e:
         st.error(f"Database error updating transport availability: {e}")
@@ -403,29 +662,97 @@ def update_transport_availability(listing_id: int, is_available: bool) -> bool:
 def delete_transport_listing(listing_id: int) -> bool:
     """Delete a transport listing from the database"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM transport_listings WHERE id = ?", (listing_id,))
-        conn.commit()
+        with db.transaction(changes_listings=True) as conn:
+            cursor = conn.execute("DELETE FROM transport_listings WHERE id = ?", (listing_id,))
         return cursor.rowcount > 0
     except sqlite3.Error as e:
         st.error(f"Database error deleting transport listing: {e}")
         return False
 
 # UI Components
-def show_header():
-    st.markdown("""
-    <div style="background: linear-gradient(to right, #0E1117, #262730); padding: 20px; border-radius: 15px; 
-    box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3); margin-bottom: 30px; display: flex; align-items: center;">
-        <img src="https://img.freepik.com/free-vector/farmland-logo-design-template_23-2149511359.jpg" 
-             style="width:100px; height:100px; border-radius: 50%; margin-right: 20px; border: 2px solid #4CAF50;"
-             alt="AgriMarket Logo">
-        <div>
-            <h1 style="margin: 0; color: #5CDB95; font-size: 2.5rem; font-weight: 800;">AgriMarket</h1>
-            <h3 style="margin: 0; color: #ffffff; font-weight: 400; opacity: 0.8;">Buy & Sell Agricultural Products</h3>
+HEADER_HTML = """
+<div style="background: linear-gradient(to right, #0E1117, #262730); padding: 20px; border-radius: 15px; 
+box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3); margin-bottom: 30px; display: flex; align-items: center;">
+    <img src="https://img.freepik.com/free-vector/farmland-logo-design-template_23-2149511359.jpg" 
+         style="width:100px; height:100px; border-radius: 50%; margin-right: 20px; border: 2px solid #4CAF50;"
+         alt="AgriMarket Logo">
+    <div>
+        <h1 style="margin: 0; color: #5CDB95; font-size: 2.5rem; font-weight: 800;">AgriMarket</h1>
+        <h3 style="margin: 0; color: #ffffff; font-weight: 400; opacity: 0.8;">Buy & Sell Agricultural Products</h3>
+    </div>
+</div>
+"""
+
+TRANSPORT_HEADER_HTML = """
+<div style="background: linear-gradient(to right, #0E1117, #262730); padding: 20px; border-radius: 15px; 
+box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3); margin-bottom: 30px; display: flex; align-items: center;">
+    <img src="https://img.freepik.com/free-vector/farmland-logo-design-template_23-2149511359.jpg" 
+         style="width:100px; height:100px; border-radius: 50%; margin-right: 20px; border: 2px solid #4CAF50;"
+         alt="AgriMarket Logo">
+    <div>
+        <h1 style="margin: 0; color: #5CDB95; font-size: 2.5rem; font-weight: 800;">AgriMarket</h1>
+        <h3 style="margin: 0; color: #ffffff; font-weight: 400; opacity: 0.8;">Transport Services</h3>
+    </div>
+</div>
+"""
+
+_CARD_TEMPLATE = """
+<div style="background: linear-gradient(to bottom right, #1E2530, #2E3440); 
+            border-radius: 15px; padding: 1rem; margin: 10px 0 0.5rem 0;
+            box-shadow: 0 8px 12px rgba(0, 0, 0, 0.3); border: 1px solid rgba(76, 175, 80, 0.2);
+            display: grid; grid-template-columns: 1fr 3fr; gap: 1rem;">
+    <figure style="margin: 0; text-align: center;">
+        <img src="{image_src}" alt="{caption}" style="width: 200px; max-width: 100%; border-radius: 10px;">
+        <figcaption style="font-size: 0.85rem; opacity: 0.7;">{caption}</figcaption>
+    </figure>
+    <div>
+        <h3 style="margin: 0 0 10px 0;">{name}</h3>
+        <div style="background-color: rgba(76, 175, 80, 0.2); display: inline-block; 
+                  padding: 5px 10px; border-radius: 15px; margin-bottom: 10px;
+                  border: 1px solid #4CAF50; color: #5CDB95; font-weight: bold;">
+            {badge}
         </div>
+        <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem; align-items: center; margin-bottom: 10px;">
+            <div><strong>Quantity:</strong> {quantity} {unit}</div>
+            <div><strong>Price:</strong> ₹{price} per {unit}</div>
+            <div style="background-color: rgba(76, 175, 80, 0.15); padding: 8px; 
+                      border-radius: 5px; text-align: center; font-weight: bold;">
+                Total: ₹{total_value:.2f}
+            </div>
+        </div>
+        <p><strong>Location:</strong> {location}</p>
+        <p><strong>Seller:</strong> {seller_name}</p>
+        <p><strong>Contact:</strong> {contact}</p>
+        <p><strong>Listed on:</strong> {date}</p>
     </div>
-    """, unsafe_allow_html=True)
+</div>
+"""
+
+def _listing_card_html(name: str, badge: str, unit: str, listing, fallback_image: str, fallback_caption: str) -> str:
+    """Fill the listing card template, escaping seller-provided text"""
+    image_src, caption = fallback_image, fallback_caption
+    encoded = get_image_as_base64(listing.card_image) if listing.has_image else None
+    if encoded:
+        mime_type = mimetypes.guess_type(listing.card_image)[0] or 'image/jpeg'
+        image_src, caption = f"data:{mime_type};base64,{encoded}", name
+    
+    return _CARD_TEMPLATE.format_map({
+        'image_src': image_src,
+        'caption': html.escape(caption),
+        'name': html.escape(name),
+        'badge': badge,
+        'quantity': listing.quantity,
+        'unit': html.escape(unit),
+        'price': listing.price,
+        'total_value': float(listing.quantity) * float(listing.price),
+        'location': html.escape(listing.location),
+        'seller_name': html.escape(listing.seller_name),
+        'contact': html.escape(listing.contact),
+        'date': html.escape(listing.date or 'N/A'),
+    })
+
+def show_header():
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 def show_main_page():
     show_header()
@@ -462,143 +789,45 @@ def show_main_page():
     
     st.markdown("### Recent Listings")
     
-    crop_listings = get_all_crop_listings()
-    pesticide_listings = get_all_pesticide_listings()
+    has_crops = has_crop_listings()
+    has_pesticides = has_pesticide_listings()
     
-    if not crop_listings and not pesticide_listings:
+    if not has_crops and not has_pesticides:
         st.info("No listings available yet. Be the first to add a listing!")
     else:
         tabs = st.tabs(["Crops", "Pesticides"])
         
         with tabs[0]:
-            if crop_listings:
-                show_crop_listings(crop_listings[:5])  # Show only 5 most recent listings
+            if has_crops:
+                show_crop_listings(get_recent_crop_listings(5))  # Show only 5 most recent listings
             else:
                 st.info("No crop listings available yet.")
         
         with tabs[1]:
-            if pesticide_listings:
-                show_pesticide_listings(pesticide_listings[:5])  # Show only 5 most recent listings
+            if has_pesticides:
+                show_pesticide_listings(get_recent_pesticide_listings(5))  # Show only 5 most recent listings
             else:
                 st.info("No pesticide listings available yet.")
 
-def show_crop_listings(listings: List[Dict]):
-    for i, listing in enumerate(listings):
-        with st.container():
-            st.markdown("""
-            <div style="background: linear-gradient(to bottom right, #1E2530, #2E3440); 
-                        border-radius: 15px; padding: 1rem; margin-bottom: 1.5rem;
-                        box-shadow: 0 8px 12px rgba(0, 0, 0, 0.3); border: 1px solid rgba(76, 175, 80, 0.2);">
-            </div>
-            """, unsafe_allow_html=True)
-            
-            col1, col2 = st.columns([1, 3])
-            
-            with col1:
-                if 'image_path' in listing and listing['image_path'] and os.path.exists(listing['image_path']):
-                    st.image(listing['image_path'], width=200, caption=listing['crop_name'])
-                else:
-                    st.image("https://img.freepik.com/free-photo/plant-growing-soil-with-word-organic_1150-18226.jpg", 
-                            width=200, caption="Product Image")
-            
-            with col2:
-                st.subheader(listing['crop_name'])
-                
-                st.markdown(
-                    f"""
-                    <div style="background-color: rgba(76, 175, 80, 0.2); display: inline-block; 
-                              padding: 5px 10px; border-radius: 15px; margin-bottom: 10px;
-                              border: 1px solid #4CAF50; color: #5CDB95; font-weight: bold;">
-                        Crop
-                    </div>
-                    """, 
-                    unsafe_allow_html=True
-                )
-                
-                col_a, col_b, col_c = st.columns(3)
-                with col_a:
-                    st.markdown(f"**Quantity:** {listing['quantity']} kg")
-                with col_b:
-                    st.markdown(f"**Price:** ₹{listing['price']} per kg")
-                with col_c:
-                    total_value = float(listing['quantity']) * float(listing['price'])
-                    st.markdown(
-                        f"""
-                        <div style="background-color: rgba(76, 175, 80, 0.15); padding: 8px; 
-                                  border-radius: 5px; text-align: center; font-weight: bold;">
-                            Total: ₹{total_value:.2f}
-                        </div>
-                        """, 
-                        unsafe_allow_html=True
-                    )
-                
-                st.markdown(f"**Location:** {listing['location']}")
-                st.markdown(f"**Seller:** {listing['seller_name']}")
-                st.markdown(f"**Contact:** {listing['contact']}")
-                st.markdown(f"**Listed on:** {listing.get('date', 'N/A')}")
-                
-                st.button(f"Contact Seller 📞", key=f"contact_{i}")
-        
-        st.markdown("<div style='height: 10px'></div>", unsafe_allow_html=True)
+def show_crop_listings(listings: pd.DataFrame):
+    for i, listing in enumerate(listings.itertuples(index=False)):
+        st.markdown(
+            _listing_card_html(listing.crop_name, "Crop", "kg", listing,
+                               "https://img.freepik.com/free-photo/plant-growing-soil-with-word-organic_1150-18226.jpg",
+                               "Product Image"),
+            unsafe_allow_html=True
+        )
+        st.button(f"Contact Seller 📞", key=f"contact_{i}")
 
-def show_pesticide_listings(listings: List[Dict]):
-    for i, listing in enumerate(listings):
-        with st.container():
-            st.markdown("""
-            <div style="background: linear-gradient(to bottom right, #1E2530, #2E3440); 
-                        border-radius: 15px; padding: 1rem; margin-bottom: 1.5rem;
-                        box-shadow: 0 8px 12px rgba(0, 0, 0, 0.3); border: 1px solid rgba(76, 175, 80, 0.2);">
-            </div>
-            """, unsafe_allow_html=True)
-            
-            col1, col2 = st.columns([1, 3])
-            
-            with col1:
-                if 'image_path' in listing and listing['image_path'] and os.path.exists(listing['image_path']):
-                    st.image(listing['image_path'], width=200, caption=listing['pesticide_name'])
-                else:
-                    st.image("https://img.freepik.com/free-photo/farmer-spraying-pesticide-crops_23-2148488637.jpg", 
-                            width=200, caption="Pesticide Image")
-            
-            with col2:
-                st.subheader(listing['pesticide_name'])
-                
-                st.markdown(
-                    f"""
-                    <div style="background-color: rgba(76, 175, 80, 0.2); display: inline-block; 
-                              padding: 5px 10px; border-radius: 15px; margin-bottom: 10px;
-                              border: 1px solid #4CAF50; color: #5CDB95; font-weight: bold;">
-                        Pesticide
-                    </div>
-                    """, 
-                    unsafe_allow_html=True
-                )
-                
-                col_a, col_b, col_c = st.columns(3)
-                with col_a:
-                    st.markdown(f"**Quantity:** {listing['quantity']} {listing['unit']}")
-                with col_b:
-                    st.markdown(f"**Price:** ₹{listing['price']} per {listing['unit']}")
-                with col_c:
-                    total_value = float(listing['quantity']) * float(listing['price'])
-                    st.markdown(
-                        f"""
-                        <div style="background-color: rgba(76, 175, 80, 0.15); padding: 8px; 
-                                  border-radius: 5px; text-align: center; font-weight: bold;">
-                            Total: ₹{total_value:.2f}
-                        </div>
-                        """, 
-                        unsafe_allow_html=True
-                    )
-                
-                st.markdown(f"**Location:** {listing['location']}")
-                st.markdown(f"**Seller:** {listing['seller_name']}")
-                st.markdown(f"**Contact:** {listing['contact']}")
-                st.markdown(f"**Listed on:** {listing.get('date', 'N/A')}")
-                
-                st.button(f"Contact Seller 📞", key=f"pesticide_contact_{i}")
-        
-        st.markdown("<div style='height: 10px'></div>", unsafe_allow_html=True)
+def show_pesticide_listings(listings: pd.DataFrame):
+    for i, listing in enumerate(listings.itertuples(index=False)):
+        st.markdown(
+            _listing_card_html(listing.pesticide_name, "Pesticide", listing.unit, listing,
+                               "https://img.freepik.com/free-photo/farmer-spraying-pesticide-crops_23-2148488637.jpg",
+                               "Pesticide Image"),
+            unsafe_allow_html=True
+        )
+        st.button(f"Contact Seller 📞", key=f"pesticide_contact_{i}")
 
 def show_buy_page():
     show_header()
@@ -613,13 +842,13 @@ def show_buy_page():
     
     if product_type == "Crops":
         crop_listings = get_all_crop_listings()
-        if not crop_listings:
+        if crop_listings.empty:
             st.info("No crop listings available. Check back later or add your own listing!")
         else:
             show_crop_listings(crop_listings)
     else:
         pesticide_listings = get_all_pesticide_listings()
-        if not pesticide_listings:
+        if pesticide_listings.empty:
             st.info("No pesticide listings available. Check back later or add your own listing!")
         else:
             show_pesticide_listings(pesticide_listings)
@@ -688,7 +917,7 @@ def show_crop_sell_form():
                 errors.append("Price must be greater than 0")
             
             if not errors:
-                image_path = save_uploaded_image(uploaded_file) if uploaded_file else None
+                image_path, thumb_path = save_uploaded_image(uploaded_file) if uploaded_file else (None, None)
                 
                 listing = {
                     'crop_name': crop_name.strip(),
@@ -698,6 +927,7 @@ def show_crop_sell_form():
                     'contact': contact.strip(),
                     'location': location.strip(),
                     'image_path': image_path,
+                    'thumb_path': thumb_path,
                     'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 }
                 
@@ -759,7 +989,7 @@ def show_pesticide_sell_form():
                 errors.append("Price must be greater than 0")
             
             if not errors:
-                image_path = save_uploaded_image(uploaded_file) if uploaded_file else None
+                image_path, thumb_path = save_uploaded_image(uploaded_file) if uploaded_file else (None, None)
                 
                 listing = {
                     'pesticide_name': pesticide_name.strip(),
@@ -770,6 +1000,7 @@ def show_pesticide_sell_form():
                     'contact': contact.strip(),
                     'location': location.strip(),
                     'image_path': image_path,
+                    'thumb_path': thumb_path,
                     'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 }
                 
@@ -784,18 +1015,7 @@ def show_pesticide_sell_form():
 
 def show_transport_page():
     """Display the transport page with options for offering or finding transport"""
-    st.markdown("""
-    <div style="background: linear-gradient(to right, #0E1117, #262730); padding: 20px; border-radius: 15px; 
-    box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3); margin-bottom: 30px; display: flex; align-items: center;">
-        <img src="https://img.freepik.com/free-vector/farmland-logo-design-template_23-2149511359.jpg" 
-             style="width:100px; height:100px; border-radius: 50%; margin-right: 20px; border: 2px solid #4CAF50;"
-             alt="AgriMarket Logo">
-        <div>
-            <h1 style="margin: 0; color: #5CDB95; font-size: 2.5rem; font-weight: 800;">AgriMarket</h1>
-            <h3 style="margin: 0; color: #ffffff; font-weight: 400; opacity: 0.8;">Transport Services</h3>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(TRANSPORT_HEADER_HTML, unsafe_allow_html=True)
     
     if st.button("← Back to Main Page"):
         st.session_state.current_view = "main"
@@ -820,94 +1040,157 @@ def show_transport_page():
     else:
         show_my_transport_listings()
 
+# Columns shown in the transport listings grid, with their display names
+TRANSPORT_TABLE_COLUMNS = {
+    'vehicle_type': "Vehicle",
+    'provider_name': "Provider",
+    'capacity': "Capacity",
+    'capacity_unit': "Unit",
+    'rate_per_km': "Rate (₹/km)",
+    'available_from': "From",
+    'available_to': "To",
+    'available_date': "Available on",
+    'contact': "Contact",
+    'sample_cost_50km': "Cost for 50km (₹)",
+}
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _transport_facets(fingerprint: str, _listings: pd.DataFrame) -> Tuple[List[str], List[str], np.ndarray, Dict[int, Dict]]:
+    """Build filter options, provider labels and an id lookup once per dataset fingerprint"""
+    # _listings is not hashed by Streamlit; the fingerprint identifies the dataset.
+    # The result is shared without copying on each rerun, so callers must treat it as read-only
+    labels = (_listings['id'].astype(str) + " - " + _listings['vehicle_type'].astype(str)
+              + " - " + _listings['provider_name']).to_numpy()
+    return (
+        ["All"] + _listings['vehicle_type'].cat.categories.tolist(),
+        ["All"] + _listings['available_from'].cat.categories.tolist(),
+        labels,
+        {listing['id']: listing for listing in _listings.to_dict('records')},
+    )
+
 def show_find_transport():
     """Display available transport options for users to book"""
     st.header("Find Transport Services")
     
     transport_listings = get_available_transport_listings()
     
-    if not transport_listings:
+    if transport_listings.empty:
         st.info("No transport services are currently available. Check back later or offer your own transport service!")
         return
     
+    # Facets and labels only change with the data, not with the selected filters.
+    # Hash the rows themselves: writes from another process reload the frame without a version bump
+    row_hashes = pd.util.hash_pandas_object(transport_listings, index=False).to_numpy()
+    fingerprint = hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+    vehicle_types, locations, provider_labels, listings_by_id = _transport_facets(fingerprint, transport_listings)
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        vehicle_types = ["All"] + sorted(list(set(listing['vehicle_type'] for listing in transport_listings)))
         selected_vehicle = st.selectbox("Filter by Vehicle Type", vehicle_types)
     
     with col2:
-        locations = ["All"] + sorted(list(set(listing['available_from'] for listing in transport_listings)))
         selected_location = st.selectbox("Filter by Starting Location", locations)
     
-    filtered_listings = transport_listings
+    # Column-wise boolean masks instead of per-row dict lookups
+    mask = np.ones(len(transport_listings), dtype=bool)
     if selected_vehicle != "All":
-        filtered_listings = [listing for listing in filtered_listings if listing['vehicle_type'] == selected_vehicle]
-    
+        mask &= (transport_listings['vehicle_type'] == selected_vehicle).to_numpy()
     if selected_location != "All":
-        filtered_listings = [listing for listing in filtered_listings if listing['available_from'] == selected_location]
+        mask &= (transport_listings['available_from'] == selected_location).to_numpy()
+    filtered_listings = transport_listings.loc[mask]
     
-    st.subheader("Calculate Transport Cost")
-    col1, col2, col3 = st.columns(3)
+    if filtered_listings.empty:
+        st.info("No transport services match the selected filters.")
+        return
     
-    with col1:
-        selected_id = st.selectbox(
-            "Select a transport provider", 
-            [""] + [f"{listing['id']} - {listing['vehicle_type']} - {listing['provider_name']}" 
-                   for listing in filtered_listings]
-        )
+    # Keep the same options list object while data and filters are unchanged;
+    # a cache_data lookup would hand back a fresh unpickled copy every rerun
+    options_key = (fingerprint, selected_vehicle, selected_location)
+    if st.session_state.get('provider_options_key') != options_key:
+        st.session_state.provider_options_key = options_key
+        st.session_state.provider_options = [""] + provider_labels[mask].tolist()
+    provider_options = st.session_state.provider_options
     
-    with col2:
-        distance = st.number_input("Distance (km)", min_value=1, value=10)
+    st.subheader("Calculate Transport Cost")
     
-    with col3:
+    # A form so typing a distance doesn't rerun the page until the user submits
+    with st.form("cost_calc"):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            selected_id = st.selectbox(
+                "Select a transport provider", 
+                provider_options
+            )
+        
+        with col2:
+            distance = st.number_input("Distance (km)", min_value=1, value=10)
+        
+        with col3:
+            calculate = st.form_submit_button("Calculate Cost")
+            request_booking = st.form_submit_button("Request Booking")
+    
+    # One booking button for the selected provider instead of one per listing
+    if calculate or request_booking:
+        selected_listing = None
         if selected_id:
-            listing_id = int(selected_id.split("-")[0].strip())
-            selected_listing = next((listing for listing in filtered_listings if listing['id'] == listing_id), None)
-            
-            if selected_listing:
-                cost = selected_listing['rate_per_km'] * distance
-                st.metric("Estimated Cost", f"₹{cost:.2f}")
-                
-                if st.button("Book Transport", key="book_transport"):
-                    st.success(f"Your booking request has been sent to {selected_listing['provider_name']}. They will contact you soon on your registered phone number.")
+            listing_id = int(selected_id.partition(" - ")[0])
+            selected_listing = listings_by_id.get(listing_id)
+        
+        if selected_listing:
+            cost = selected_listing['rate_per_km'] * distance
+            st.metric("Estimated Cost", f"₹{cost:.2f}")
+            if request_booking:
+                st.success(f"Your booking request has been sent to {selected_listing['provider_name']}. They will contact you soon on your registered phone number.")
+        else:
+            st.warning("Please select a transport provider first.")
     
     st.subheader("Available Transport Services")
     
-    for listing in filtered_listings:
-        col1, col2 = st.columns([1, 3])
+    # One virtualized grid for every match instead of a widget tree per listing
+    st.dataframe(
+        filtered_listings[list(TRANSPORT_TABLE_COLUMNS)].rename(columns=TRANSPORT_TABLE_COLUMNS),
+        width="stretch",
+        hide_index=True
+    )
+    
+    details_id = st.selectbox(
+        "View details",
+        provider_options
+    )
+    listing = listings_by_id.get(int(details_id.partition(" - ")[0])) if details_id else None
+    if not listing:
+        return
+    
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        if listing['has_image']:
+            st.image(listing['card_image'], width=200, caption=listing['vehicle_type'])
+        else:
+            st.image("https://img.freepik.com/free-photo/delivery-concept-handsome-african-american-delivery-man-isolated-grey-studio-background_1157-48472.jpg", 
+                    width=200, caption="Transport Vehicle")
+    
+    with col2:
+        st.subheader(f"{listing['vehicle_type']} - {listing['provider_name']}")
         
-        with col1:
-            if 'image_path' in listing and listing['image_path'] and os.path.exists(listing['image_path']):
-                st.image(listing['image_path'], width=200, caption=listing['vehicle_type'])
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            st.markdown(f"**Capacity:** {listing['capacity']} {listing['capacity_unit']}")
+        with col_b:
+            st.markdown(f"**Rate:** ₹{listing['rate_per_km']} per km")
+        with col_c:
+            if listing['available_date']:
+                st.markdown(f"**Available on:** {listing['available_date']}")
             else:
-                st.image("https://img.freepik.com/free-photo/delivery-concept-handsome-african-american-delivery-man-isolated-grey-studio-background_1157-48472.jpg", 
-                        width=200, caption="Transport Vehicle")
+                st.markdown("**Available:** Anytime")
         
-        with col2:
-            st.subheader(f"{listing['vehicle_type']} - {listing['provider_name']}")
-            
-            col_a, col_b, col_c = st.columns(3)
-            with col_a:
-                st.markdown(f"**Capacity:** {listing['capacity']} {listing['capacity_unit']}")
-            with col_b:
-                st.markdown(f"**Rate:** ₹{listing['rate_per_km']} per km")
-            with col_c:
-                if listing['available_date']:
-                    st.markdown(f"**Available on:** {listing['available_date']}")
-                else:
-                    st.markdown("**Available:** Anytime")
-            
-            st.markdown(f"**Route:** {listing['available_from']} to {listing['available_to'] if listing['available_to'] else 'Any location'}")
-            st.markdown(f"**Contact:** {listing['contact']}")
-            
-            if listing.get('description'):
-                with st.expander("View Details"):
-                    st.markdown(listing['description'])
-            
-            sample_distance = 50  # 50 km example
-            sample_cost = listing['rate_per_km'] * sample_distance
-            st.markdown(f"**Sample cost for {sample_distance}km:** ₹{sample_cost:.2f}")
-            
-            if st.button(f"Request Booking - {listing['id']}", key=f"req_booking_{listing['id']}"):
-                  st.success(f"Your booking request has been sent to {listing['provider_name']}. They will contact you soon.")
+        st.markdown(f"**Route:** {listing['available_from']} to {listing['available_to'] if listing['available_to'] else 'Any location'}")
+        st.markdown(f"**Contact:** {listing['contact']}")
+        
+        if listing['description']:
+            with st.expander("View Details"):
+                st.markdown(listing['description'])
+        
+        st.markdown(f"**Sample cost for 50km:** ₹{listing['sample_cost_50km']:.2f}")